@@ -1,6 +1,7 @@
 import pygame
 import random
 import pickle
+import functools
 
 #initialize Pygame
 pygame.init()
@@ -12,6 +13,16 @@ GRID_WIDTH = 10
 GRID_HEIGHT = 20
 CELL_SIZE = 30
 
+#frame rate, and milliseconds between drops
+FPS = 60
+DROP_INTERVAL = 200
+
+#how long the game over message stays up, in milliseconds
+GAME_OVER_DELAY = 2000
+
+#each grid row is a bitmask, bit x set when column x is filled
+FULL_ROW = (1 << GRID_WIDTH) - 1
+
 #colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -40,172 +51,281 @@ SHAPES = [
      [0, 0, 1]]
 ]
 
+
+#rotate a shape clockwise
+def rotate_shape(shape):
+    return [list(row) for row in zip(*shape[::-1])]
+
+
+#flatten a shape into the (x, y) offsets of its filled cells
+def shape_cells(shape):
+    return tuple((x, y) for y, row in enumerate(shape) for x, cell in enumerate(row) if cell)
+
+
+#the distinct orientations of a shape as cell offsets
+#rotating stops once it comes back round, so O has 1 orientation and I, S and Z have 2
+def shape_orientations(shape):
+    orientations = [shape_cells(shape)]
+    rotated = rotate_shape(shape)
+    while shape_cells(rotated) != orientations[0]:
+        orientations.append(shape_cells(rotated))
+        rotated = rotate_shape(rotated)
+    return orientations
+
+
+#every orientation of each shape, indexed [piece][rotation]
+ROTATIONS = [shape_orientations(shape) for shape in SHAPES]
+
+#column each piece spawns at, centred on the grid
+SPAWN_X = [GRID_WIDTH // 2 - len(shape[0]) // 2 for shape in SHAPES]
+
 #initialise screen
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption('Tetris')
 
+#only queue the events the game loop handles, mouse motion and the rest are dropped by SDL
+#VIDEOEXPOSE is kept so an uncovered window gets redrawn
+EVENT_TYPES = [pygame.QUIT, pygame.KEYDOWN, pygame.VIDEOEXPOSE]
+pygame.event.set_blocked(None)
+pygame.event.set_allowed(EVENT_TYPES)
+
+#movement keys and the (dx, dy) offset each one applies
+MOVES = {
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+    pygame.K_DOWN: (0, 1),
+}
+
+#fonts and fixed text are created once instead of every frame
+#text surfaces are converted to the display format so blitting them skips per-pixel conversion
+FONT = pygame.font.Font(None, 36)
+GAME_OVER_TEXT = FONT.render("Game Over", True, WHITE).convert_alpha()
+GAME_OVER_POS = GAME_OVER_TEXT.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)).topleft
+
+
+#screen rect of every grid cell, indexed [y][x]
+CELL_RECTS = [
+    [pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE) for x in range(GRID_WIDTH)]
+    for y in range(GRID_HEIGHT)
+]
+
+#draw the grid lines onto a screen-sized background
+def build_grid_surface():
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    surface.fill(BLACK)
+    for rects in CELL_RECTS:
+        for rect in rects:
+            pygame.draw.rect(surface, GRAY, rect, 1)
+    return surface
+
+
+#the grid lines never change, so they are drawn once
+#blitting the background each frame also clears the screen, so no separate fill is needed
+GRID_SURFACE = build_grid_surface()
+
 
 #draw the grid
 def draw_grid():
-    for y in range(GRID_HEIGHT):
-        for x in range(GRID_WIDTH):
-            rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            pygame.draw.rect(screen, GRAY, rect, 1)
+    screen.blit(GRID_SURFACE, (0, 0))
 
 
 #draw a piece
-def draw_piece(piece, offset):
-    shape = SHAPES[piece]
+def draw_piece(cells, offset):
     off_x, off_y = offset
-    for y, row in enumerate(shape):
-        for x, cell in enumerate(row):
-            if cell:
-                rect = pygame.Rect((off_x + x) * CELL_SIZE, (off_y + y) * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, WHITE, rect)
+    for x, y in cells:
+        pygame.draw.rect(screen, WHITE, CELL_RECTS[off_y + y][off_x + x])
 
 
 #check collision
-def check_collision(grid, shape, offset):
+def check_collision(grid, cells, offset):
     off_x, off_y = offset
-    for y, row in enumerate(shape):
-        for x, cell in enumerate(row):
-            if cell:
-                if x + off_x < 0 or x + off_x >= GRID_WIDTH or y + off_y >= GRID_HEIGHT:
-                    return True
-                if y + off_y < 0 or grid[y + off_y][x + off_x]:
-                    return True
+    for x, y in cells:
+        x += off_x
+        y += off_y
+        if not (0 <= x < GRID_WIDTH and 0 <= y < GRID_HEIGHT) or grid[y] >> x & 1:
+            return True
     return False
 
 
+#how many rows a piece can fall before it lands
+def drop_distance(grid, cells, offset):
+    off_x, off_y = offset
+    distance = GRID_HEIGHT
+    for x, y in cells:
+        bit = 1 << (x + off_x)
+        below = y + off_y + 1
+        while below < GRID_HEIGHT and not grid[below] & bit:
+            below += 1
+        distance = min(distance, below - (y + off_y) - 1)
+    return distance
+
+
 #lock a piece in place
-def lock_piece(grid, shape, offset):
+def lock_piece(grid, cells, offset):
     off_x, off_y = offset
-    for y, row in enumerate(shape):
-        for x, cell in enumerate(row):
-            if cell:
-                grid[y + off_y][x + off_x] = 1
+    for x, y in cells:
+        grid[y + off_y] |= 1 << (x + off_x)
 
 
 #clear completed lines
 def clear_lines(grid):
-    new_grid = [row for row in grid if any(cell == 0 for cell in row)]
+    if FULL_ROW not in grid:
+        return grid, 0
+    new_grid = [row for row in grid if row != FULL_ROW]
     lines_cleared = GRID_HEIGHT - len(new_grid)
-    new_grid = [[0] * GRID_WIDTH for _ in range(lines_cleared)] + new_grid
+    new_grid = [0] * lines_cleared + new_grid
     return new_grid, lines_cleared
 
 
 #draw the grid cells
 def draw_grid_cells(grid):
-    for y in range(GRID_HEIGHT):
+    #bound once, this loop can draw up to 200 cells
+    draw_rect = pygame.draw.rect
+    for y, row in enumerate(grid):
+        if not row:
+            continue
+        rects = CELL_RECTS[y]
         for x in range(GRID_WIDTH):
-            if grid[y][x]:
-                rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                pygame.draw.rect(screen, WHITE, rect)
+            if row >> x & 1:
+                draw_rect(screen, WHITE, rects[x])
+
+
+#render a line of HUD text, cached because the same strings are redrawn until the value changes
+@functools.lru_cache(maxsize=16)
+def render_text(text):
+    return FONT.render(text, True, WHITE).convert_alpha()
 
 
-#display score
-def draw_score(score):
-    font = pygame.font.Font(None, 36)
-    text = font.render(f"Score: {score}", True, WHITE)
-    screen.blit(text, (10, 10))
+#resolve the score and level text into (surface, position) pairs
+def build_hud(score, level):
+    return (
+        (render_text(f"Score: {score}"), (10, 10)),
+        (render_text(f"Level: {level}"), (200, 10)),
+    )
 
 
-#draw the level
-def draw_level(level):
-    font = pygame.font.Font(None, 36)
-    text = font.render(f"Level: {level}", True, WHITE)
-    screen.blit(text, (200, 10))
+#display score and level, batched into one blits call
+def draw_hud(hud):
+    screen.blits(hud, doreturn=False)
 
 
 #save the game
-def save_game(grid, piece, piece_x, piece_y, score, level, speed):
+def save_game(grid, piece, rotation, piece_x, piece_y, score, level, speed):
     with open("savegame.pkl", "wb") as f:
-        pickle.dump((grid, piece, piece_x, piece_y, score, level, speed, f))
+        pickle.dump((grid, piece, rotation, piece_x, piece_y, score, level, speed), f)
     
 
-#load the game
+#load the game, None if nothing has been saved yet
 def load_game():
-    with open("savegame.pkl", "rb") as f:
-        return pickle.load(f)
+    try:
+        with open("savegame.pkl", "rb") as f:
+            state = pickle.load(f)
+    except (FileNotFoundError, EOFError):
+        return None
+    #older saves without the rotation can't be restored safely, treat them as no save
+    if len(state) != 8:
+        return None
+    return state
 
 
 #main game loop
 def main():
-    global grid
-    grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+    grid = [0] * GRID_HEIGHT
     clock = pygame.time.Clock()
+    drop_timer = 0
     piece = random.randint(0, len(SHAPES) - 1)
-    piece_x = GRID_WIDTH // 2 - len(SHAPES[piece][0]) // 2
+    piece_x = SPAWN_X[piece]
     piece_y = 0
+    rotation = 0
+    cells = ROTATIONS[piece][rotation]
     score = 0
     level = 1
+    #rebuilt only when the score or level changes
+    hud = build_hud(score, level)
     speed = 5
     running = True
     game_over = False
     paused = False
+    #only redraw when something on screen may have changed
+    dirty = True
 
 
     while running:
-        screen.fill(BLACK)
-        draw_grid()
-        draw_grid_cells(grid)
-        draw_piece(piece, (piece_x, piece_y))
-        draw_score(score)
-        draw_level(level)
-        pygame.display.flip()
-
-        for event in pygame.event.get():
+        if dirty:
+            draw_grid()
+            draw_grid_cells(grid)
+            draw_piece(cells, (piece_x, piece_y))
+            draw_hud(hud)
+            pygame.display.flip()
+            dirty = False
+
+        for event in pygame.event.get(EVENT_TYPES):
+            dirty = True
             if event.type == pygame.QUIT:
-                running = False
+                return
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    if not check_collision(grid, SHAPES[piece], (piece_x - 1, piece_y)):
-                        piece_x -= 1
-                elif event.key == pygame.K_RIGHT:
-                    if not check_collision(grid, SHAPES[piece], (piece_x + 1, piece_y)):
-                        piece_x += 1
+                if event.key in MOVES:
+                    dx, dy = MOVES[event.key]
+                    if not check_collision(grid, cells, (piece_x + dx, piece_y + dy)):
+                        piece_x += dx
+                        piece_y += dy
                 elif event.key == pygame.K_UP:
-                    rotated_piece = list(zip(*SHAPES[piece][::-1]))
-                    if not check_collision(grid, rotated_piece, (piece_x, piece_y)):
-                        SHAPES[piece] = rotated_piece
-                elif event.key == pygame.K_DOWN:
-                    if not check_collision(grid, SHAPES[piece], (piece_x, piece_y + 1)):
-                        piece_y += 1
+                    new_rotation = (rotation + 1) % len(ROTATIONS[piece])
+                    if new_rotation != rotation and not check_collision(grid, ROTATIONS[piece][new_rotation], (piece_x, piece_y)):
+                        rotation = new_rotation
+                        cells = ROTATIONS[piece][rotation]
                 elif event.key == pygame.K_SPACE:
-                    while not check_collision(grid, SHAPES[piece], (piece_x, piece_y + 1)):
-                        piece_y += 1
+                    piece_y += drop_distance(grid, cells, (piece_x, piece_y))
+                    #lock on this frame rather than waiting for the next drop
+                    drop_timer = DROP_INTERVAL
                 elif event.key == pygame.K_s:
-                    save_game(grid, piece, piece_x, piece_y, score, level, speed)
+                    save_game(grid, piece, rotation, piece_x, piece_y, score, level, speed)
                 elif event.key == pygame.K_l:
-                    grid, piece, piece_x, piece_y, score, level, speed = load_game()
-
-        if not paused and not game_over:
-            if not check_collision(grid, SHAPES[piece], (piece_x, piece_y + 1)):
+                    saved = load_game()
+                    if saved:
+                        grid, piece, rotation, piece_x, piece_y, score, level, speed = saved
+                        cells = ROTATIONS[piece][rotation]
+                        hud = build_hud(score, level)
+
+        if not paused and not game_over and drop_timer >= DROP_INTERVAL:
+            drop_timer %= DROP_INTERVAL
+            dirty = True
+            if not check_collision(grid, cells, (piece_x, piece_y + 1)):
                 piece_y += 1
             else:
-                lock_piece(grid, SHAPES[piece], (piece_x, piece_y))
+                lock_piece(grid, cells, (piece_x, piece_y))
                 grid, lines_cleared = clear_lines(grid)
                 score += lines_cleared * 100
-                if lines_cleared > 0 and score // (level * 100) > 0:
-                    level += 1
-                    speed = max(1, speed - 1)
+                if lines_cleared > 0:
+                    if score // (level * 100) > 0:
+                        level += 1
+                        speed = max(1, speed - 1)
+                    hud = build_hud(score, level)
                 piece = random.randint(0, len(SHAPES) - 1)
-                piece_x = GRID_WIDTH // 2 - len(SHAPES[piece][0]) // 2
+                piece_x = SPAWN_X[piece]
                 piece_y = 0
-                if check_collision(grid, SHAPES[piece], (piece_x, piece_y)):
+                rotation = 0
+                cells = ROTATIONS[piece][rotation]
+                if check_collision(grid, cells, (piece_x, piece_y)):
                     game_over = True
 
         if game_over:
-            font = pygame.font.Font(None, 36)
-            text = font.render("Game Over", True, WHITE)
-            screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT // 2 - text.get_height() // 2))
+            screen.blit(GAME_OVER_TEXT, GAME_OVER_POS)
             pygame.display.flip()
-            pygame.time.wait(2000)
+            #keep draining the queue while the message is shown so the window stays responsive
+            deadline = pygame.time.get_ticks() + GAME_OVER_DELAY
+            while pygame.time.get_ticks() < deadline:
+                if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                    break
+                clock.tick(FPS)
             running = False
 
-        clock.tick(5)
+        drop_timer += clock.tick(FPS)
 
-    pygame.quit()
 
 if __name__ == '__main__':
-    main()
+    #single shutdown path, also taken if the game loop raises
+    try:
+        main()
+    finally:
+        pygame.quit()